@@ -22,10 +22,15 @@ Principais Funcionalidades:
 """
 
 # Importações de bibliotecas padrão e de terceiros
+import os
+import sys
 import time
+import signal
 import logging
 import locale
 import random
+import threading
+from collections import Counter
 
 # Importações específicas do Selenium
 from selenium import webdriver
@@ -54,6 +59,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Perfilamento por amostragem (diagnóstico de ciclos lentos).
+# O profiler pode ser ligado sem reiniciar o bot de três formas:
+#   - PERFIL_ATIVO = True, para amostrar desde o primeiro ciclo;
+#   - enviando o sinal SIGUSR1 ao processo (ex: `kill -USR1 <pid>`): liga na próxima
+#     fase de atualização ou, se já estiver ligado, encerra na hora e grava o relatório;
+#   - criando o arquivo PERFIL_ARQUIVO_GATILHO na pasta de execução (útil no Windows).
+PERFIL_ATIVO = False
+PERFIL_TAXA_HZ = 100  # Amostras de pilha por segundo.
+PERFIL_CICLOS = 1  # Quantidade de ciclos amostrados antes de gravar o relatório.
+PERFIL_DIRETORIO = "perfis"
+PERFIL_ARQUIVO_GATILHO = "perfil.ativar"
+PERFIL_TOP_FUNCOES = 25
+
 # ============================
 # MAPEAMENTO DE ELEMENTOS (Locators)
 # ============================
@@ -198,6 +216,295 @@ def validar_entrada_numerica(prompt, minimo=1, maximo=None):
             print("Entrada inválida. Por favor, digite apenas números.")
 
 
+# ============================
+# PERFILAMENTO POR AMOSTRAGEM
+# ============================
+
+# Estado do profiler. Enquanto desligado não existe thread de amostragem,
+# e o laço principal apenas consulta algumas chaves uma vez por ciclo.
+# 'alternar_solicitado' é o único campo escrito pelo handler de SIGUSR1.
+_perfil = {
+    "thread": None,
+    "parar": None,
+    "alternar_solicitado": False,
+    "iniciar_no_ciclo": False,
+    "em_espera": False,
+    "ciclos_restantes": 0,
+    "ciclos_amostrados": 0,
+    "ultimo_relatorio": None,
+}
+
+
+def _pilha_colapsada(frame, nome_thread):
+    """
+    Converte um frame em uma linha de pilha colapsada ('raiz;...;folha'),
+    o formato aceito por flamegraph.pl, speedscope e inferno.
+    """
+    funcoes = []
+    while frame is not None:
+        codigo = frame.f_code
+        funcoes.append(f"{os.path.basename(codigo.co_filename)}:{codigo.co_name}")
+        frame = frame.f_back
+    funcoes.append(nome_thread.replace(' ', '_').replace(';', '_'))
+    funcoes.reverse()
+    return ';'.join(funcoes)
+
+
+def _amostrar_pilhas(parar, intervalo):
+    """
+    Laço da thread de amostragem: registra a pilha de todas as outras threads.
+
+    Cada tick é agendado contra um prazo em time.monotonic(), para que o custo
+    da amostragem não reduza a taxa configurada. Ticks durante a espera pelo
+    timer de câmbio (ver esperar_sem_amostrar) são descartados.
+
+    Termina quando 'parar' é sinalizado ou quando chega um pedido de SIGUSR1,
+    e então grava o próprio relatório, fora do contexto do handler de sinal.
+    """
+    ident_proprio = threading.get_ident()
+    pilhas = Counter()
+    ticks = 0
+    tempo_ativo = 0.0
+    anterior = proximo = time.monotonic()
+    while True:
+        proximo += intervalo
+        if parar.wait(max(0.0, proximo - time.monotonic())):
+            break
+        if _perfil["alternar_solicitado"]:
+            break
+
+        agora = time.monotonic()
+        if proximo < agora - intervalo:
+            # A amostragem ficou para trás (GIL ocupado): descarta os ticks perdidos.
+            proximo = agora
+        if _perfil["em_espera"]:
+            anterior = agora
+            continue
+        tempo_ativo += agora - anterior
+        anterior = agora
+
+        nomes = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == ident_proprio:
+                continue
+            pilhas[_pilha_colapsada(frame, nomes.get(ident, f"thread-{ident}"))] += 1
+        ticks += 1
+
+    # Um pedido de SIGUSR1 que chegue junto com o fim pela contagem de ciclos
+    # também é um pedido de parada; não deve religar o profiler.
+    _perfil["alternar_solicitado"] = False
+    taxa_medida = ticks / tempo_ativo if tempo_ativo > 0 else 0.0
+    _perfil["ultimo_relatorio"] = _gravar_relatorio_perfil(
+        pilhas, ticks, _perfil["ciclos_amostrados"], 1.0 / intervalo, taxa_medida
+    )
+    _perfil["thread"] = None
+
+
+def _tabela_top_funcoes(pilhas, limite, ordenar_por="propria"):
+    """
+    Monta a tabela das funções mais amostradas.
+
+    'Própria' conta as amostras em que a função estava no topo da pilha;
+    'Inclusiva' conta as amostras em que ela aparecia em qualquer posição.
+    Os percentuais são sobre as amostras de pilha de todas as threads
+    (ticks x threads), não sobre os ticks de amostragem.
+
+    Args:
+        pilhas (Counter): Contagem de amostras por pilha colapsada.
+        limite (int): Quantidade de linhas da tabela.
+        ordenar_por (str): 'propria' ou 'inclusiva'. A ordem inclusiva mostra
+            wrappers sem tempo próprio, como o cliente HTTP do Selenium.
+    """
+    propria = Counter()
+    inclusiva = Counter()
+    for pilha, quantidade in pilhas.items():
+        funcoes = pilha.split(';')[1:]  # Descarta o nome da thread.
+        if not funcoes:
+            continue
+        propria[funcoes[-1]] += quantidade
+        for funcao in set(funcoes):
+            inclusiva[funcao] += quantidade
+
+    total = sum(pilhas.values()) or 1
+    linhas = [f"{'Própria':>9} {'%':>6} {'Inclusiva':>10} {'%':>6}  Função"]
+    ranking = inclusiva if ordenar_por == "inclusiva" else propria
+    for funcao, _ in ranking.most_common(limite):
+        linhas.append(
+            f"{propria[funcao]:>9} {100 * propria[funcao] / total:>5.1f}% "
+            f"{inclusiva[funcao]:>10} {100 * inclusiva[funcao] / total:>5.1f}%  {funcao}"
+        )
+    return '\n'.join(linhas)
+
+
+def _caminho_relatorio_livre():
+    """Gera um caminho base único (com milissegundos) para o relatório em PERFIL_DIRETORIO."""
+    agora = time.time()
+    nome = time.strftime("perfil_%Y%m%d_%H%M%S", time.localtime(agora)) + f"_{int(agora * 1000) % 1000:03d}"
+    base = os.path.join(PERFIL_DIRETORIO, nome)
+    caminho, sufixo = base, 1
+    while os.path.exists(f"{caminho}.folded"):
+        caminho = f"{base}_{sufixo}"
+        sufixo += 1
+    return caminho
+
+
+def _gravar_relatorio_perfil(pilhas, ticks, ciclos, taxa_configurada, taxa_medida):
+    """
+    Grava o relatório de perfilamento em PERFIL_DIRETORIO.
+
+    São gerados dois arquivos: '.folded' (pilhas colapsadas, prontas para
+    flamegraph) e '_top.txt' (funções mais amostradas por tempo próprio e
+    por tempo inclusivo).
+
+    Returns:
+        str: O caminho base dos arquivos gravados, ou None se nada foi gravado.
+    """
+    if not pilhas:
+        logger.warning("Perfilamento encerrado sem nenhuma amostra coletada.")
+        return None
+
+    total = sum(pilhas.values())
+    resumo = f"{ticks} ticks de amostragem a {taxa_medida:.1f} Hz, {total} amostras de pilha (todas as threads), {ciclos} ciclo(s) completo(s)"
+    try:
+        os.makedirs(PERFIL_DIRETORIO, exist_ok=True)
+        caminho_base = _caminho_relatorio_livre()
+        with open(f"{caminho_base}.folded", 'x', encoding='utf-8') as arquivo:
+            for pilha, quantidade in sorted(pilhas.items()):
+                arquivo.write(f"{pilha} {quantidade}\n")
+
+        with open(f"{caminho_base}_top.txt", 'x', encoding='utf-8') as arquivo:
+            arquivo.write(f"Ciclos completos amostrados: {ciclos}\n")
+            arquivo.write(f"Ticks de amostragem: {ticks}\n")
+            arquivo.write(f"Taxa de amostragem: {taxa_configurada:.0f} Hz configurada, {taxa_medida:.1f} Hz medida\n")
+            arquivo.write(f"Amostras de pilha (todas as threads, base dos %): {total}\n\n")
+            arquivo.write("Por tempo próprio:\n")
+            arquivo.write(_tabela_top_funcoes(pilhas, PERFIL_TOP_FUNCOES) + "\n\n")
+            arquivo.write("Por tempo inclusivo:\n")
+            arquivo.write(_tabela_top_funcoes(pilhas, PERFIL_TOP_FUNCOES, ordenar_por="inclusiva") + "\n")
+    except OSError as e:
+        logger.error(f"Não foi possível gravar o relatório de perfilamento: {e}")
+        return None
+
+    logger.info(f"Perfilamento encerrado ({resumo}). Relatório em '{caminho_base}.*'.")
+    logger.info("Funções mais amostradas:\n" + _tabela_top_funcoes(pilhas, 10))
+    return caminho_base
+
+
+def iniciar_perfil(ciclos=PERFIL_CICLOS, taxa_hz=PERFIL_TAXA_HZ):
+    """
+    Liga o profiler por amostragem em uma thread daemon.
+
+    Args:
+        ciclos (int): Quantos ciclos do laço principal serão amostrados.
+        taxa_hz (int): Frequência de amostragem das pilhas, em Hz.
+
+    Returns:
+        bool: True se o profiler foi ligado, False se já estava ativo.
+    """
+    if _perfil["thread"] is not None:
+        return False
+
+    parar = threading.Event()
+    thread = threading.Thread(
+        target=_amostrar_pilhas,
+        args=(parar, 1.0 / max(taxa_hz, 1)),
+        name="perfil-amostragem",
+        daemon=True,
+    )
+    _perfil.update(
+        thread=thread, parar=parar, ciclos_restantes=max(ciclos, 1),
+        ciclos_amostrados=0, ultimo_relatorio=None,
+    )
+    thread.start()
+    logger.info(f"Perfilamento iniciado: {taxa_hz} Hz por {_perfil['ciclos_restantes']} ciclo(s).")
+    return True
+
+
+def parar_perfil():
+    """
+    Desliga o profiler e aguarda a thread de amostragem gravar o relatório.
+
+    Não deve ser chamada a partir de um handler de sinal.
+
+    Returns:
+        str: O caminho base dos arquivos gravados, ou None se nada foi gravado.
+    """
+    thread = _perfil["thread"]
+    if thread is None:
+        return None
+
+    _perfil["parar"].set()
+    thread.join()
+    return _perfil["ultimo_relatorio"]
+
+
+def _alternar_perfil_por_sinal(signum, frame):
+    """
+    Handler de SIGUSR1. Apenas registra o pedido: com o profiler ligado, a
+    thread de amostragem o encerra e grava o relatório; desligado, ele é
+    ligado por verificar_perfil_no_ciclo() na próxima fase de atualização.
+    """
+    _perfil["alternar_solicitado"] = True
+
+
+def instalar_gatilho_perfil():
+    """Registra o SIGUSR1 para alternar o profiler, nas plataformas que o suportam."""
+    sinal = getattr(signal, "SIGUSR1", None)
+    if sinal is None:
+        logger.info(f"SIGUSR1 indisponível; crie o arquivo '{PERFIL_ARQUIVO_GATILHO}' para ativar o perfilamento.")
+        return
+    signal.signal(sinal, _alternar_perfil_por_sinal)
+    logger.info(f"Perfilamento sob demanda: envie SIGUSR1 ao PID {os.getpid()}.")
+
+
+def esperar_sem_amostrar(segundos):
+    """
+    Dorme pelos segundos indicados sem gerar amostras de perfilamento.
+
+    A espera pelo timer de câmbio pode durar muitos minutos e, por ser uma
+    chamada em C, apareceria como tempo próprio de principal(), escondendo
+    o trabalho real do ciclo no relatório.
+    """
+    _perfil["em_espera"] = True
+    try:
+        time.sleep(segundos)
+    finally:
+        _perfil["em_espera"] = False
+
+
+def verificar_perfil_no_ciclo():
+    """
+    Chamada a cada ciclo do laço principal, após a espera pelo timer e antes
+    da atualização da página.
+
+    Desconta o ciclo anterior do profiler ativo (gravando o relatório quando
+    a contagem chega a zero) e, com o profiler desligado, atende os pedidos
+    pendentes: PERFIL_ATIVO no primeiro ciclo, SIGUSR1 ou o arquivo-gatilho.
+    """
+    if _perfil["thread"] is not None:
+        _perfil["ciclos_amostrados"] += 1
+        _perfil["ciclos_restantes"] -= 1
+        if _perfil["ciclos_restantes"] <= 0:
+            parar_perfil()
+
+    # Com o profiler ligado, o arquivo-gatilho fica para depois do relatório.
+    if _perfil["thread"] is not None:
+        return
+
+    solicitado = _perfil["iniciar_no_ciclo"] or _perfil["alternar_solicitado"]
+    _perfil["iniciar_no_ciclo"] = False
+    _perfil["alternar_solicitado"] = False
+    if os.path.exists(PERFIL_ARQUIVO_GATILHO):
+        try:
+            os.remove(PERFIL_ARQUIVO_GATILHO)
+        except OSError as e:
+            logger.warning(f"Não foi possível remover o arquivo-gatilho do perfilamento: {e}")
+        solicitado = True
+
+    if solicitado:
+        iniciar_perfil()
+
+
 # ============================
 # FUNÇÕES DE INTERAÇÃO (Selenium)
 # ============================
@@ -592,6 +899,11 @@ def principal():
             return
 
         logger.info(f"Quantidade padrão definida para {quantidade_padrao_de_troca:n} diamantes por recurso.")
+
+        instalar_gatilho_perfil()
+        # O profiler é ligado pelo próprio laço, no primeiro ciclo, após a espera pelo timer.
+        _perfil["iniciar_no_ciclo"] = PERFIL_ATIVO
+
         logger.info("Iniciando o primeiro ciclo do bot...")
 
         # --- LOOP DE CICLO AUTÔNOMO ---
@@ -608,9 +920,10 @@ def principal():
                 tempo_formatado = formatar_segundos(segundos_restantes)
                 logger.info(f"Aguardando {tempo_formatado} para a atualização das taxas...")
                 # Adiciona um buffer de 15s para garantir que o servidor atualizou
-                time.sleep(segundos_restantes + 15)
+                esperar_sem_amostrar(segundos_restantes + 15)
 
             # 2. FASE DE ATUALIZAÇÃO
+            verificar_perfil_no_ciclo()
             logger.info("Tempo esgotado. Recarregando a página para obter novas taxas...")
             driver.refresh()
             WebDriverWait(driver, 20).until(
@@ -643,6 +956,7 @@ def principal():
         logger.info("Bot interrompido pelo usuário.")
     finally:
         logger.info("Encerrando o bot...")
+        parar_perfil()
         if aba_original and len(driver.window_handles) > 1:
             try:
                 driver.close()